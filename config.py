@@ -0,0 +1,62 @@
+"""
+Centralized application settings.
+
+Configuration used to be scattered os.getenv calls at the top of main.py,
+which validated nothing (a missing DATABASE_PORT surfaced later as a
+TypeError inside PostgresTools) and invited re-reading the environment in
+request paths. Settings is populated and validated exactly once per process
+via pydantic-settings and frozen afterwards; everything imports the shared
+`settings` instance (or calls get_settings()).
+"""
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import load_dotenv
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+# Libraries like the OpenAI SDK read os.environ directly, so .env still has
+# to be exported into the process environment - once, here, at import time.
+load_dotenv()
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore", frozen=True)
+
+    # OpenAI (required - fail at boot, not on the first request)
+    openai_api_key: str
+
+    # Database
+    database_connection_string: Optional[str] = None
+    database_host: Optional[str] = None
+    database_port: Optional[int] = None
+    database_name: Optional[str] = None
+    database_user: Optional[str] = None
+    database_password: Optional[str] = None
+
+    # Runtime
+    env: str = "development"
+    port: int = 8000
+    web_concurrency: Optional[int] = None
+    redis_url: Optional[str] = None
+
+    # Connection pool
+    pg_pool_warm: int = 5
+
+    # Agent
+    num_history_runs: int = 8
+
+    # HNSW vector index
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 64
+    hnsw_ef_search: int = 40
+    hnsw_ef_search_fast: int = 20
+    hnsw_ef_search_deep: int = 40
+    hnsw_maintenance_work_mem: str = "512MB"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
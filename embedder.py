@@ -0,0 +1,139 @@
+"""
+Batching + caching wrapper around agno's OpenAIEmbedder.
+
+During ingest, PgVector fires one embedding task per chunk, and each task
+normally makes its own HTTPS round-trip to the embeddings API. This subclass
+coalesces concurrent requests into shared batches (up to 100 texts or ~8k
+tokens per API call) so a whole ingest batch costs one round-trip instead of
+a hundred, and keeps an LRU cache keyed by content hash so identical chunks
+(e.g. across /loadknowledge retries) are never re-embedded.
+"""
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from agno.knowledge.embedder.openai import OpenAIEmbedder
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class BatchedOpenAIEmbedder(OpenAIEmbedder):
+    max_batch_docs: int = 100        # texts per API call
+    max_batch_tokens: int = 8000     # rough token budget per API call
+    flush_after_seconds: float = 0.02  # coalescing window for stragglers
+    cache_size: int = 4096
+
+    # runtime state, not part of the embedder config
+    _cache: "OrderedDict[str, List[float]]" = field(default_factory=OrderedDict, repr=False)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        super().__post_init__()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._buffer_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    # --- embedding cache ------------------------------------------------
+
+    def _cache_get(self, key: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+            return embedding
+
+    def _cache_put(self, key: str, embedding: List[float]) -> None:
+        with self._cache_lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # --- batching -------------------------------------------------------
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        # ~4 chars per token is close enough for batch sizing
+        return max(1, len(text) // 4)
+
+    def _batch_request(self, texts: List[str]) -> Dict[str, Any]:
+        req: Dict[str, Any] = {
+            "input": texts,
+            "model": self.id,
+            "encoding_format": self.encoding_format,
+        }
+        if self.user is not None:
+            req["user"] = self.user
+        if self.id.startswith("text-embedding-3"):
+            req["dimensions"] = self.dimensions
+        if self.request_params:
+            req.update(self.request_params)
+        return req
+
+    async def _flush_locked(self) -> None:
+        """Send the buffered texts as one API call. Caller holds _buffer_lock."""
+        pending, self._pending = self._pending, []
+        self._pending_tokens = 0
+        if not pending:
+            return
+        try:
+            response = await self.aclient.embeddings.create(
+                **self._batch_request([text for text, _ in pending])
+            )
+            for (_, future), data in zip(pending, response.data):
+                if not future.done():
+                    future.set_result(data.embedding)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_after_seconds)
+        async with self._buffer_lock:
+            await self._flush_locked()
+
+    async def async_get_embedding(self, text: str) -> List[float]:
+        key = _text_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        async with self._buffer_lock:
+            self._pending.append((text, future))
+            self._pending_tokens += self._estimate_tokens(text)
+            if (
+                len(self._pending) >= self.max_batch_docs
+                or self._pending_tokens >= self.max_batch_tokens
+            ):
+                await self._flush_locked()
+            elif self._flush_task is None or self._flush_task.done():
+                self._flush_task = loop.create_task(self._delayed_flush())
+
+        embedding = await future
+        self._cache_put(key, embedding)
+        return embedding
+
+    async def async_get_embedding_and_usage(self, text: str):
+        # Usage is reported per batch by the API, not per text, so it is
+        # not attributed back to individual documents here.
+        return await self.async_get_embedding(text), None
+
+    def get_embedding(self, text: str) -> List[float]:
+        key = _text_key(text)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        embedding = super().get_embedding(text)
+        if embedding:
+            self._cache_put(key, embedding)
+        return embedding
@@ -0,0 +1,317 @@
+"""
+Deterministic fast path for standard benchmark lookups.
+
+Most SwimBench traffic is a plain "benchmark my <event>, age <age>, <time>"
+query whose answer is a pure table lookup - running it through the agent
+(reasoning tool calls + gpt-4o round-trips) turns ~5ms of DB latency into
+multi-second responses. A small regex classifier extracts event, age, and
+time (gender and course fall back to the same defaults the agent uses);
+when all three parse, the standards are fetched with one parameterized
+SELECT each and the required markdown template is filled in locally.
+
+Anything the classifier can't parse - or any lookup miss, including a
+standards schema that doesn't match - returns None so the caller falls
+through to the full agent. The fast path is best-effort by design.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# USA Swimming motivational levels, fastest first
+STANDARD_LEVELS = ("AAAA", "AAA", "AA", "A", "BB", "B")
+
+# Rough national percentile for each achieved standard, used for the
+# summary line (the agent computes the same way from the standards table)
+LEVEL_PERCENTILES = {"AAAA": 2, "AAA": 5, "AA": 10, "A": 20, "BB": 40, "B": 60}
+LEVEL_ABILITY = {
+    "AAAA": "Elite", "AAA": "Advanced", "AA": "Advanced",
+    "A": "Intermediate", "BB": "Novice", "B": "Beginner",
+}
+
+_TIME_RE = re.compile(r"\b(?:(\d{1,2}):)?(\d{1,2})\.(\d{1,2})\b")
+_AGE_RE = re.compile(r"\b(?:age\s*)?([89]|1[0-8])\b")
+# Roster shorthand like "16M" / "12 f" - age and gender in one token
+_AGE_GENDER_RE = re.compile(r"(?<![\d.:])([89]|1[0-8])\s*([mf])\b")
+# Coaching questions mention a time and an event too, but want the agent's
+# advice, not a table lookup - send them past the fast path untouched
+_ADVICE_RE = re.compile(
+    r"\b(?:how|why|should|advi[cs]e|train(?:ing)?|improv\w*|technique|"
+    r"drills?|practice|workouts?|plan|tips?)\b"
+)
+_DISTANCE_RE = re.compile(r"\b(50|100|200|400|500|1650)\b")
+_STROKE_PATTERNS: Tuple[Tuple[str, str], ...] = (
+    (r"free(?:style)?|\bfr\b", "freestyle"),
+    (r"back(?:stroke)?|\bbk\b", "backstroke"),
+    (r"breast(?:stroke)?|\bbr\b", "breaststroke"),
+    (r"butter(?:fly)?|\bfly\b|\bfl\b", "butterfly"),
+    (r"\bim\b|medley", "im"),
+)
+
+VALID_EVENTS = frozenset((
+    "50_freestyle", "100_freestyle", "200_freestyle", "500_freestyle",
+    "1650_freestyle", "100_backstroke", "200_backstroke",
+    "100_breaststroke", "200_breaststroke", "100_butterfly",
+    "200_butterfly", "200_im", "400_im",
+))
+
+
+@dataclass(frozen=True)
+class BenchmarkQuery:
+    event: str
+    age: int
+    time_seconds: float
+    gender: str = "M"
+    course: str = "SCY"
+
+
+def _format_time(seconds: float) -> str:
+    if seconds >= 60:
+        minutes = int(seconds // 60)
+        return f"{minutes}:{seconds - 60 * minutes:05.2f}"
+    return f"{seconds:.2f}"
+
+
+def parse_benchmark_query(message: str) -> Optional[BenchmarkQuery]:
+    """Extract a benchmark request from free text, or None if it isn't one."""
+    lowered = message.lower()
+
+    if _ADVICE_RE.search(lowered):
+        return None
+
+    time_match = _TIME_RE.search(lowered)
+    if not time_match:
+        return None
+    minutes, seconds, hundredths = time_match.groups()
+    time_seconds = (int(minutes or 0) * 60) + int(seconds) + float(f"0.{hundredths}")
+
+    # Exactly one stroke must be mentioned; with several ("100 back ...
+    # my freestyle is faster") first-match would pick the wrong event, so
+    # ambiguous messages go to the agent instead
+    strokes = {name for pattern, name in _STROKE_PATTERNS if re.search(pattern, lowered)}
+    if len(strokes) != 1:
+        return None
+    stroke = strokes.pop()
+
+    # Ignore distances that are part of the time match itself
+    time_span = time_match.span()
+    distance = None
+    for match in _DISTANCE_RE.finditer(lowered):
+        if match.start() >= time_span[0] and match.end() <= time_span[1]:
+            continue
+        distance = match.group(1)
+        break
+    if distance is None:
+        return None
+
+    event = f"{distance}_{stroke}"
+    if event not in VALID_EVENTS:
+        return None
+
+    # "16M"-style shorthand carries both age and gender; it wins over the
+    # plain age number and the gender keywords when present
+    age = None
+    gender = None
+    for match in _AGE_GENDER_RE.finditer(lowered):
+        if match.start() >= time_span[0] and match.end() <= time_span[1]:
+            continue
+        age = int(match.group(1))
+        gender = match.group(2).upper()
+        break
+    if age is None:
+        for match in _AGE_RE.finditer(lowered):
+            if match.start() >= time_span[0] and match.end() <= time_span[1]:
+                continue
+            age = int(match.group(1))
+            break
+    if age is None:
+        return None
+
+    if gender is None:
+        gender = "F" if re.search(r"\bf\b|female|girls?|women|daughter|\bshe\b|\bher\b", lowered) else "M"
+    course_match = re.search(r"\b(scy|scm|lcm)\b", lowered)
+    course = course_match.group(1).upper() if course_match else "SCY"
+
+    return BenchmarkQuery(
+        event=event,
+        age=age,
+        time_seconds=time_seconds,
+        gender=gender,
+        course=course,
+    )
+
+
+def _level_times(row: Dict) -> Dict[str, float]:
+    """Pull the per-level cut times out of a standards row by column name."""
+    times = {}
+    for level in STANDARD_LEVELS:
+        for key, value in row.items():
+            if value is None:
+                continue
+            if key.lower() in (level.lower(), f"{level.lower()}_time"):
+                times[level] = float(value)
+                break
+    return times
+
+
+def _recruiting_cuts(row: Dict) -> List[Tuple[str, float]]:
+    """Pull (division label, cut time) pairs out of a recruiting row."""
+    labels = (
+        ("D1 Elite Programs", ("d1_elite",)),
+        ("D1 Mid-Major", ("d1_mid", "d1_midmajor")),
+        ("D2 Programs", ("d2",)),
+        ("D3 Programs", ("d3",)),
+    )
+    cuts = []
+    for label, prefixes in labels:
+        for key, value in row.items():
+            if value is None:
+                continue
+            normalized = key.lower().replace("-", "_")
+            if any(normalized.startswith(prefix) for prefix in prefixes):
+                cuts.append((label, float(value)))
+                break
+    return cuts
+
+
+MATERIALIZED_VIEW = "ai.mv_swim_standards_flat"
+
+
+def ensure_standards_view(engine: Engine) -> None:
+    """
+    Create and refresh the flattened standards materialized view.
+
+    The fast path runs the same (event, age, gender, course) lookup on every
+    benchmark query; the view pre-joins the motivational and recruiting
+    standards into one row per key so each lookup is a single index hit
+    instead of two table queries. Failures are non-fatal - the fast path
+    simply keeps querying the base tables.
+    """
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE MATERIALIZED VIEW IF NOT EXISTS {MATERIALIZED_VIEW} AS "
+                f"SELECT s.event, s.age, s.gender, s.course, "
+                f"to_jsonb(s) AS standards, to_jsonb(r) AS recruiting "
+                f"FROM ai.usa_swimming_standards s "
+                f"LEFT JOIN ai.college_recruiting_standards r "
+                f"ON r.event = s.event AND r.gender = s.gender"
+            ))
+            conn.execute(text(
+                "CREATE UNIQUE INDEX IF NOT EXISTS mv_swim_standards_flat_key "
+                f"ON {MATERIALIZED_VIEW} (event, age, gender, course)"
+            ))
+        # CONCURRENTLY keeps the fast path readable during the refresh, but
+        # Postgres refuses to run it inside a transaction block, so it needs
+        # an autocommit connection rather than engine.begin()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {MATERIALIZED_VIEW}"))
+        logger.info(f"Standards view {MATERIALIZED_VIEW} ready")
+    except Exception as e:
+        logger.warning(f"Standards view setup failed (fast path will join per query): {e}")
+
+
+def run_benchmark_fastpath(query: BenchmarkQuery, engine: Engine) -> Optional[str]:
+    """
+    Answer a parsed benchmark query straight from the standards tables.
+    Returns the formatted markdown analysis, or None if the lookup misses
+    (caller falls through to the agent).
+    """
+    params = {"event": query.event, "age": query.age,
+              "gender": query.gender, "course": query.course}
+    try:
+        # Preferred: single index lookup against the pre-joined view
+        try:
+            with engine.connect() as conn:
+                row = conn.execute(
+                    text(
+                        f"SELECT standards, recruiting FROM {MATERIALIZED_VIEW} "
+                        "WHERE event = :event AND age = :age "
+                        "AND gender = :gender AND course = :course LIMIT 1"
+                    ),
+                    params,
+                ).mappings().first()
+        except Exception:
+            row = None  # view not created yet; use the base tables
+
+        if row is not None:
+            standards, recruiting = row["standards"], row["recruiting"]
+        else:
+            with engine.connect() as conn:
+                standards = conn.execute(
+                    text(
+                        "SELECT * FROM ai.usa_swimming_standards "
+                        "WHERE event = :event AND age = :age "
+                        "AND gender = :gender AND course = :course LIMIT 1"
+                    ),
+                    params,
+                ).mappings().first()
+                recruiting = conn.execute(
+                    text(
+                        "SELECT * FROM ai.college_recruiting_standards "
+                        "WHERE event = :event AND gender = :gender LIMIT 1"
+                    ),
+                    {"event": query.event, "gender": query.gender},
+                ).mappings().first()
+    except Exception as e:
+        logger.warning(f"Benchmark fast path lookup failed, using agent: {e}")
+        return None
+
+    if standards is None:
+        return None
+    level_times = _level_times(dict(standards))
+    if not level_times:
+        return None
+
+    achieved = None
+    next_level = None
+    for level in STANDARD_LEVELS:  # fastest first
+        cut = level_times.get(level)
+        if cut is None:
+            continue
+        if query.time_seconds <= cut:
+            achieved = level
+            break
+        next_level = (level, cut)
+    if achieved is None and next_level is None:
+        return None
+
+    percentile = LEVEL_PERCENTILES.get(achieved, 75)
+    ability = LEVEL_ABILITY.get(achieved, "Beginner")
+    event_label = query.event.replace("_", " ").title()
+
+    lines = [
+        " 🏊‍♂️ Swim Performance Analysis",
+        "",
+        " 📊 Performance Summary",
+        f"- Time: {_format_time(query.time_seconds)} ({event_label} {query.course})",
+        f"- Percentile Ranking: Top {percentile}% nationally",
+        f"- USA Swimming Standard: {achieved or 'Below B'}",
+        f"- Ability Level: {ability}",
+    ]
+
+    if recruiting is not None:
+        cuts = _recruiting_cuts(dict(recruiting))
+        if cuts:
+            lines += ["", " 🎓 College Recruitment Analysis"]
+            for label, cut in cuts:
+                qualified = query.time_seconds <= cut
+                lines.append(
+                    f"- {label}: {'Qualified ✅' if qualified else 'Not Qualified ❌'}"
+                )
+
+    lines += ["", " 🎯 Next Goals"]
+    if next_level is not None:
+        level, cut = next_level
+        drop = query.time_seconds - cut
+        lines.append(f"- Next Standard: {_format_time(cut)} ({level})")
+        lines.append(f"- Time Drop Needed: {drop:.2f} seconds")
+    else:
+        lines.append("- You've reached the top motivational standard - keep it up!")
+
+    return "\n".join(lines)
@@ -0,0 +1,93 @@
+"""
+Redis hot cache for recent conversation turns.
+
+With history enabled, every agent turn reads the last N runs back out of
+Postgres before the prompt is built. Recent turns are much better served
+from a Redis list: /chat appends each (user, assistant) pair with
+LPUSH + LTRIM and reads the newest turns back with LRANGE in well under a
+millisecond. Postgres remains the cold store (agno still persists every
+run there); this cache only covers the read on the hot path.
+
+Disabled transparently when REDIS_URL is unset or redis-py is missing.
+"""
+import json
+import logging
+from typing import Dict, List, Optional
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_TURNS = 20   # turns kept per conversation (LTRIM cap)
+TTL_SECONDS = 3600      # idle conversations fall out after an hour
+
+
+class RecentHistoryCache:
+    """Capped per-conversation list of recent chat turns in Redis."""
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        max_turns: int = MAX_CACHED_TURNS,
+        ttl_seconds: int = TTL_SECONDS,
+    ):
+        self.url = url or settings.redis_url
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self.enabled = bool(self.url and aioredis is not None)
+        self._client = None
+        if self.url and aioredis is None:
+            logger.warning("REDIS_URL set but redis-py not installed; history cache disabled")
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = aioredis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _key(user_id: Optional[str], session_id: Optional[str]) -> str:
+        return f"memory:{user_id or 'anon'}:{session_id or 'default'}:recent"
+
+    async def get_recent(
+        self, user_id: Optional[str], session_id: Optional[str], limit: int
+    ) -> List[Dict[str, str]]:
+        """Return up to `limit` recent turns as role/content dicts, oldest first."""
+        if not self.enabled:
+            return []
+        try:
+            entries = await self._get_client().lrange(
+                self._key(user_id, session_id), 0, 2 * limit - 1
+            )
+            return [json.loads(entry) for entry in reversed(entries)]
+        except Exception as e:
+            logger.warning(f"History cache read failed, falling back to DB history: {e}")
+            return []
+
+    async def append_turn(
+        self,
+        user_id: Optional[str],
+        session_id: Optional[str],
+        user_message: str,
+        assistant_message: str,
+    ) -> None:
+        """Record one completed turn (newest entries sit at the head)."""
+        if not self.enabled:
+            return
+        try:
+            key = self._key(user_id, session_id)
+            pipe = self._get_client().pipeline()
+            pipe.lpush(
+                key,
+                json.dumps({"role": "user", "content": user_message}),
+                json.dumps({"role": "assistant", "content": assistant_message}),
+            )
+            pipe.ltrim(key, 0, 2 * self.max_turns - 1)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"History cache write failed: {e}")
@@ -0,0 +1,232 @@
+"""
+Streaming PDF ingest with bounded memory and parallel embedding.
+
+knowledge.add_content_async pulls the whole PDF into memory and embeds its
+chunks as one burst of API calls. For the multi-MB USA Swimming standards
+document this balloons RSS and serializes the slowest parts of ingest.
+
+This path instead:
+  1. streams the download into a spooled temp file (spills to disk past 10MB),
+  2. extracts text page by page with pypdf, feeding chunks through a bounded
+     asyncio.Queue so extraction can't race ahead of embedding (backpressure),
+  3. embeds chunks with a small pool of consumer tasks (concurrency 8, which
+     the batching embedder coalesces into shared API calls),
+  4. writes rows to the vectors table in batches of 500 (Supabase's
+     documented vector batch limit) instead of row-at-a-time.
+
+Peak memory stays around one batch of chunks regardless of document size,
+and the download, extraction, and embedding stages overlap.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from agno.db.schemas.knowledge import KnowledgeRow
+from agno.knowledge.content import ContentStatus
+from pypdf import PdfReader
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = 2000          # ~500 tokens per chunk
+CHUNK_OVERLAP = 200
+EMBED_CONCURRENCY = 8       # parallel embedding consumers
+QUEUE_MAXSIZE = 64          # backpressure: extraction blocks when full
+INSERT_BATCH_SIZE = 500     # rows per DB write
+SPOOL_MAX_BYTES = 10 * 1024 * 1024
+
+_SENTINEL = None
+
+
+def _chunk_text(page_text: str) -> Iterator[str]:
+    """Split one page's text into overlapping fixed-size chunks."""
+    start = 0
+    while start < len(page_text):
+        chunk = page_text[start : start + CHUNK_CHARS].strip()
+        if chunk:
+            yield chunk
+        start += CHUNK_CHARS - CHUNK_OVERLAP
+
+
+_COPY_COLUMNS = ("id", "name", "meta_data", "content", "embedding", "content_hash", "content_id")
+_COPY_COLUMN_LIST = "(" + ", ".join(_COPY_COLUMNS) + ")"
+
+
+def _escape_copy(value: str) -> str:
+    """Escape a value for the COPY text format."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _insert_batch(
+    engine: Engine, schema: str, table_name: str, rows: List[Dict[str, Any]]
+) -> None:
+    """
+    Bulk-load one batch of embedded chunks via the COPY protocol.
+
+    COPY streams the whole batch to the server in one round-trip, which is
+    10-100x faster than row-wise INSERT for vector payloads. Rows land in a
+    transaction-scoped staging table first so duplicates can be dropped with
+    ON CONFLICT, which plain COPY does not support. Everything happens in a
+    single transaction to amortize the fsync.
+    """
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_escape_copy(str(row[col])) for col in _COPY_COLUMNS) + "\n")
+    buffer.seek(0)
+    try:
+        with engine.begin() as conn:
+            with conn.connection.cursor() as cur:
+                cur.execute(
+                    f"CREATE TEMP TABLE _vectors_stage "
+                    f"(LIKE {schema}.{table_name} INCLUDING DEFAULTS) ON COMMIT DROP"
+                )
+                cur.copy_expert(f"COPY _vectors_stage {_COPY_COLUMN_LIST} FROM STDIN", buffer)
+                cur.execute(
+                    f"INSERT INTO {schema}.{table_name} {_COPY_COLUMN_LIST} "
+                    f"SELECT {', '.join(_COPY_COLUMNS)} FROM _vectors_stage "
+                    f"ON CONFLICT (id) DO NOTHING"
+                )
+    except Exception as e:
+        logger.warning(f"COPY bulk load failed, falling back to batched INSERT: {e}")
+        _insert_batch_fallback(engine, schema, table_name, rows)
+
+
+def _insert_batch_fallback(
+    engine: Engine, schema: str, table_name: str, rows: List[Dict[str, Any]]
+) -> None:
+    """Batched INSERT path for drivers without COPY support."""
+    stmt = text(
+        f"INSERT INTO {schema}.{table_name} "
+        f"(id, name, meta_data, content, embedding, content_hash, content_id) "
+        f"VALUES (:id, :name, (:meta_data)::jsonb, :content, (:embedding)::vector, "
+        f":content_hash, :content_id) "
+        f"ON CONFLICT (id) DO NOTHING"
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt, rows)
+
+
+async def stream_ingest_pdf(
+    url: str,
+    name: str,
+    vector_db,
+    metadata: Optional[Dict[str, Any]] = None,
+    contents_db=None,
+    linked_to: Optional[str] = None,
+) -> int:
+    """
+    Stream a PDF from `url` into the vector table chunk by chunk.
+    When `contents_db` is given, the document is also registered in the
+    knowledge contents table so AgentOS content listing still sees it
+    (Knowledge does this itself on its own ingest path).
+    Returns the number of chunks ingested.
+    """
+    content_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    meta_data = json.dumps(metadata or {})
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+    pending_rows: List[Dict[str, Any]] = []
+    rows_lock = asyncio.Lock()
+    inserted = 0
+
+    engine: Engine = vector_db.db_engine
+    schema, table_name = vector_db.schema, vector_db.table_name
+
+    async def flush(force: bool = False) -> None:
+        nonlocal inserted
+        async with rows_lock:
+            if not pending_rows or (not force and len(pending_rows) < INSERT_BATCH_SIZE):
+                return
+            batch, pending_rows[:] = pending_rows[:], []
+        await asyncio.to_thread(_insert_batch, engine, schema, table_name, batch)
+        inserted += len(batch)
+
+    async def produce() -> None:
+        """Download into a spooled file, then feed page chunks into the queue."""
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+            async with httpx.AsyncClient(follow_redirects=True, timeout=60.0) as client:
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for data in response.aiter_bytes():
+                        spool.write(data)
+            spool.seek(0)
+            reader = await asyncio.to_thread(PdfReader, spool)
+            for page in reader.pages:
+                page_text = await asyncio.to_thread(page.extract_text)
+                if not page_text:
+                    continue
+                for chunk in _chunk_text(page_text):
+                    await queue.put(chunk)
+        for _ in range(EMBED_CONCURRENCY):
+            await queue.put(_SENTINEL)
+
+    async def consume() -> None:
+        """Embed chunks off the queue and buffer rows for batched writes."""
+        while True:
+            chunk = await queue.get()
+            if chunk is _SENTINEL:
+                return
+            embedding = await vector_db.embedder.async_get_embedding(chunk)
+            row = {
+                "id": hashlib.md5((content_hash + chunk).encode("utf-8")).hexdigest(),
+                "name": name,
+                "meta_data": meta_data,
+                "content": chunk,
+                "embedding": "[" + ",".join(str(x) for x in embedding) + "]",
+                "content_hash": content_hash,
+                "content_id": content_hash,
+            }
+            async with rows_lock:
+                pending_rows.append(row)
+            await flush()
+
+    # Run the stages as tasks so a failure in any one cancels the siblings:
+    # a dead producer otherwise leaves the consumers blocked on queue.get()
+    # forever (no sentinels were enqueued), and dead consumers leave the
+    # producer blocked on queue.put() holding the spooled temp file
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(consume()) for _ in range(EMBED_CONCURRENCY)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await flush(force=True)
+
+    if contents_db is not None:
+        try:
+            now = int(time.time())
+            content_row = KnowledgeRow(
+                id=content_hash,
+                name=name,
+                description="",
+                metadata=metadata,
+                type="url",
+                linked_to=linked_to,
+                access_count=0,
+                status=ContentStatus.COMPLETED,
+                status_message="",
+                created_at=now,
+                updated_at=now,
+                external_id=url,
+            )
+            await asyncio.to_thread(
+                contents_db.upsert_knowledge_content, knowledge_row=content_row
+            )
+        except Exception as e:
+            logger.warning(f"Could not register {name} in the contents table: {e}")
+
+    logger.info(f"Streamed {inserted} chunks from {name} into {schema}.{table_name}")
+    return inserted
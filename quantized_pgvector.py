@@ -0,0 +1,196 @@
+"""
+PgVector variant that searches a quantized copy of the embeddings.
+
+Full fp32 1536-d OpenAI embeddings are ~6KB per row, which makes vector
+search memory- and bandwidth-bound as the table grows. This subclass keeps
+a fp16 `halfvec` shadow column (`embedding_q`, half the bytes of fp32) with
+its own HNSW index, runs the approximate search against it, and reranks the
+coarse candidates with the original fp32 column so recall is preserved.
+
+Requires pgvector 0.7+ for the halfvec type; if quantization is unavailable
+the class transparently falls back to the regular fp32 search path.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from agno.knowledge.document import Document
+from agno.utils.log import log_info, logger
+from agno.vectordb.distance import Distance
+from agno.vectordb.pgvector import PgVector
+from agno.vectordb.pgvector.index import HNSW
+from sqlalchemy import text
+
+# Coarse halfvec search fetches this many times the requested limit,
+# then the fp32 rerank keeps the best `limit`.
+COARSE_FACTOR = 4
+
+# Per-request hnsw.ef_search override. /chat sets this from the query shape
+# (short queries need less search effort for full recall in this bounded
+# domain); it propagates into the threaded search via the request context.
+ef_search_override: ContextVar[Optional[int]] = ContextVar("ef_search_override", default=None)
+
+
+class QuantizedPgVector(PgVector):
+    """PgVector with an fp16 halfvec first stage and fp32 rerank."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # None = unknown; probed lazily on first search so workers that never
+        # served /loadknowledge (or a restarted process) still find the
+        # quantized column left behind by an earlier run
+        self._quantized: Optional[bool] = None
+        self._default_ef_search = (
+            self.vector_index.ef_search if isinstance(self.vector_index, HNSW) else None
+        )
+
+    def _apply_ef_override(self) -> None:
+        """
+        Push the per-request ef_search override into the index config so
+        agno's fp32 search path (which reads vector_index.ef_search) honors
+        it too. Best-effort under concurrency: a racing request may run one
+        tier off, never with an invalid value.
+        """
+        if self._default_ef_search is None:
+            return
+        target = ef_search_override.get() or self._default_ef_search
+        if target != self.vector_index.ef_search:
+            self.vector_index = self.vector_index.model_copy(update={"ef_search": int(target)})
+
+    def _is_quantized(self) -> bool:
+        """True when the halfvec column exists; probes the catalog once."""
+        if self._quantized is None:
+            try:
+                with self.Session() as sess:
+                    row = sess.execute(
+                        text(
+                            "SELECT 1 FROM information_schema.columns "
+                            "WHERE table_schema = :schema AND table_name = :table "
+                            "AND column_name = 'embedding_q'"
+                        ),
+                        {"schema": self.schema, "table": self.table_name},
+                    ).first()
+                self._quantized = row is not None
+            except Exception as e:
+                logger.warning(f"Could not probe for quantized column: {e}")
+                return False  # leave unknown so the next search retries
+        return self._quantized
+
+    def quantize(self) -> None:
+        """
+        Create/refresh the halfvec shadow column and its HNSW index.
+        Called after ingest, once the fp32 embeddings are in place.
+        """
+        table = f"{self.schema}.{self.table_name}"
+        dim = self.embedder.dimensions
+        m = self.vector_index.m if isinstance(self.vector_index, HNSW) else 16
+        ef_construction = (
+            self.vector_index.ef_construction if isinstance(self.vector_index, HNSW) else 64
+        )
+        try:
+            with self.Session() as sess, sess.begin():
+                # Same build-time settings agno applies for the fp32 index
+                # (e.g. maintenance_work_mem for the HNSW graph build)
+                if isinstance(self.vector_index, HNSW) and self.vector_index.configuration:
+                    for key, value in self.vector_index.configuration.items():
+                        sess.execute(text(f"SET {key} = :value"), {"value": value})
+                sess.execute(
+                    text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS embedding_q halfvec({dim})")
+                )
+                sess.execute(
+                    text(
+                        f"UPDATE {table} SET embedding_q = embedding::halfvec({dim}) "
+                        f"WHERE embedding IS NOT NULL AND embedding_q IS NULL"
+                    )
+                )
+                sess.execute(
+                    text(
+                        f"CREATE INDEX IF NOT EXISTS {self.table_name}_embedding_q_hnsw "
+                        f"ON {table} USING hnsw (embedding_q halfvec_cosine_ops) "
+                        f"WITH (m = {m}, ef_construction = {ef_construction})"
+                    )
+                )
+            self._quantized = True
+            log_info(f"Quantized embeddings ready on {table}.embedding_q")
+        except Exception as e:
+            # Most likely pgvector < 0.7 (no halfvec); fp32 search still works
+            logger.warning(f"Embedding quantization unavailable, using fp32 search: {e}")
+            self._quantized = False
+
+    @staticmethod
+    def _parse_embedding(value: Any) -> Optional[List[float]]:
+        """Raw-SQL selects return pgvector columns as '[x,y,...]' strings."""
+        if value is None or isinstance(value, list):
+            return value
+        try:
+            return [float(x) for x in str(value).strip("[]").split(",")]
+        except ValueError:
+            return None
+
+    def vector_search(self, query: str, limit: int = 5, filters: Optional[Dict[str, Any]] = None) -> List[Document]:
+        if not self._is_quantized() or self.distance != Distance.cosine:
+            self._apply_ef_override()
+            return super().vector_search(query=query, limit=limit, filters=filters)
+
+        try:
+            query_embedding = self.embedder.get_embedding(query)
+            if query_embedding is None:
+                logger.error(f"Error getting embedding for Query: {query}")
+                return []
+
+            table = f"{self.schema}.{self.table_name}"
+            dim = self.embedder.dimensions
+            filter_clause = "WHERE meta_data @> (:filters)::jsonb" if filters is not None else ""
+            # Coarse ANN pass over the fp16 index, exact fp32 rerank on top
+            stmt = text(
+                f"""
+                SELECT id, name, meta_data, content, embedding, usage
+                FROM (
+                    SELECT id, name, meta_data, content, embedding, usage
+                    FROM {table}
+                    {filter_clause}
+                    ORDER BY embedding_q <=> (:qvec)::halfvec({dim})
+                    LIMIT :coarse_limit
+                ) AS coarse
+                ORDER BY embedding <=> (:qvec)::vector({dim})
+                LIMIT :limit
+                """
+            )
+            params: Dict[str, Any] = {
+                "qvec": "[" + ",".join(str(x) for x in query_embedding) + "]",
+                "coarse_limit": limit * COARSE_FACTOR,
+                "limit": limit,
+            }
+            if filters is not None:
+                import json
+
+                params["filters"] = json.dumps(filters)
+
+            with self.Session() as sess, sess.begin():
+                if self._default_ef_search is not None:
+                    ef_search = ef_search_override.get() or self._default_ef_search
+                    sess.execute(text(f"SET LOCAL hnsw.ef_search = {int(ef_search)}"))
+                results = sess.execute(stmt, params).fetchall()
+
+            search_results: List[Document] = []
+            for result in results:
+                search_results.append(
+                    Document(
+                        id=result.id,
+                        name=result.name,
+                        meta_data=result.meta_data,
+                        content=result.content,
+                        embedder=self.embedder,
+                        embedding=self._parse_embedding(result.embedding),
+                        usage=result.usage,
+                    )
+                )
+
+            if self.reranker:
+                search_results = self.reranker.rerank(query=query, documents=search_results)
+
+            log_info(f"Found {len(search_results)} documents (quantized search)")
+            return search_results
+        except Exception as e:
+            logger.error(f"Error during quantized vector search, falling back to fp32: {e}")
+            self._apply_ef_override()
+            return super().vector_search(query=query, limit=limit, filters=filters)
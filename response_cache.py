@@ -0,0 +1,74 @@
+"""
+Redis exact-match cache for agent responses.
+
+The complement of the semantic cache: before anything else, /chat looks up
+the sha256 of the normalized message and returns the stored completion on a
+hit. This catches verbatim repeats - above all the fixed redirect boilerplate
+the instructions mandate for non-swimming questions - without even paying
+for an embedding. Responses produced with tool calls are not cached, since
+those depend on live database state.
+
+Disabled transparently when REDIS_URL is unset or redis-py is missing.
+"""
+import hashlib
+import logging
+from typing import Optional
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+TTL_SECONDS = 900  # 15 minutes, matching the semantic cache
+
+
+class ExactResponseCache:
+    """sha256(prompt) -> completion cache in Redis with a short TTL."""
+
+    def __init__(self, url: Optional[str] = None, ttl_seconds: int = TTL_SECONDS):
+        self.url = url or settings.redis_url
+        self.ttl_seconds = ttl_seconds
+        self.enabled = bool(self.url and aioredis is not None)
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = aioredis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _key(message: str) -> str:
+        canonical = " ".join(message.lower().split())
+        return "llm:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def get(self, message: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        try:
+            return await self._get_client().get(self._key(message))
+        except Exception as e:
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    async def set(self, message: str, response: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self._get_client().setex(self._key(message), self.ttl_seconds, response)
+        except Exception as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    async def invalidate_all(self) -> None:
+        """Drop all cached completions (e.g. after a knowledge reload)."""
+        if not self.enabled:
+            return
+        try:
+            client = self._get_client()
+            async for key in client.scan_iter(match="llm:*"):
+                await client.delete(key)
+        except Exception as e:
+            logger.warning(f"Response cache invalidation failed: {e}")
@@ -0,0 +1,108 @@
+"""
+In-process semantic cache for SWIMBENCH AI responses.
+
+SwimBench queries are highly repetitive ("16M 100 free 48.5"), so many turns
+can be answered by reusing the response to a near-identical earlier query.
+Each incoming message is embedded, compared against the cached queries by
+cosine similarity, and the stored markdown answer is returned when the best
+match clears the similarity threshold - skipping the entire LLM round-trip.
+
+The index is a flat inner-product search over L2-normalized embeddings
+(exact top-1, same as a FAISS IndexFlatIP), which is plenty for the few
+thousand distinct queries this domain sees. Entries expire after a TTL and
+the whole cache is invalidated when the knowledge base is reloaded.
+"""
+import time
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+SIMILARITY_THRESHOLD = 0.9
+DEFAULT_TTL_SECONDS = 15 * 60  # 15 minutes
+
+
+class SemanticCache:
+    """Embedding-similarity cache mapping user queries to agent responses."""
+
+    def __init__(
+        self,
+        threshold: float = SIMILARITY_THRESHOLD,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._embeddings: Optional[np.ndarray] = None  # (N, dim), L2-normalized
+        self._responses: List[str] = []
+        self._expires_at: List[float] = []
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _prune_expired(self, now: float) -> None:
+        """Drop expired rows. Caller must hold the lock."""
+        if self._embeddings is None:
+            return
+        alive = [i for i, exp in enumerate(self._expires_at) if exp > now]
+        if len(alive) == len(self._expires_at):
+            return
+        if not alive:
+            self._embeddings = None
+            self._responses = []
+            self._expires_at = []
+            return
+        self._embeddings = self._embeddings[alive]
+        self._responses = [self._responses[i] for i in alive]
+        self._expires_at = [self._expires_at[i] for i in alive]
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[str]:
+        """Return the cached response for the closest query, or None on miss."""
+        now = time.time()
+        with self._lock:
+            self._prune_expired(now)
+            if self._embeddings is None:
+                self.misses += 1
+                return None
+            query = self._normalize(embedding)
+            similarities = self._embeddings @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                self.hits += 1
+                return self._responses[best]
+            self.misses += 1
+            return None
+
+    def store(self, embedding: Sequence[float], response: str) -> None:
+        """Cache a response under the query embedding."""
+        row = self._normalize(embedding)[np.newaxis, :]
+        with self._lock:
+            if self._embeddings is None:
+                self._embeddings = row
+            else:
+                self._embeddings = np.vstack([self._embeddings, row])
+            self._responses.append(response)
+            self._expires_at.append(time.time() + self.ttl_seconds)
+
+    def invalidate(self) -> None:
+        """Drop all cached entries (e.g. after a knowledge base reload)."""
+        with self._lock:
+            self._embeddings = None
+            self._responses = []
+            self._expires_at = []
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size, for monitoring endpoints."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self._responses),
+            }